@@ -1,29 +1,73 @@
+import atexit
 import os
 import re
 import json
+import hashlib
+import functools
+import time
+import shutil
 import smtplib
 import ssl
-import time
-import random
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from email.charset import QP, Charset
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Dict, List, Optional, Tuple
+from operator import attrgetter
+from typing import Dict, List, Optional, Pattern, Tuple
 from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup, Tag
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from dateutil import tz
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from config import SOURCES, WEIGHTS, INTENSITY_KEYWORDS, SCARCITY_KEYWORDS
+from config import SOURCES, Source, WEIGHTS, INTENSITY_KEYWORDS, SCARCITY_KEYWORDS
 
 DEFAULT_RESY_IMAGE = (os.environ.get("DEFAULT_RESY_IMAGE") or "").strip() or None
 PUBLIC_BASE_URL = (os.environ.get("PUBLIC_BASE_URL") or "").strip().rstrip("/") or None
+# Source page cache under data/http_cache: pages younger than the TTL (seconds) are
+# reused without a request; older ones are revalidated with ETag/Last-Modified.
+HTTP_CACHE_DISABLED = (os.environ.get("HTTP_CACHE_DISABLED") or "").strip().lower() in ("1", "true", "yes")
+
 
+def _env_cache_ttl() -> int:
+    raw = (os.environ.get("HTTP_CACHE_TTL") or "").strip()
+    try:
+        return int(raw) if raw else 0
+    except ValueError:
+        print(f"[HttpCache] ignoring non-integer HTTP_CACHE_TTL={raw!r}; using 0")
+        return 0
 
-@dataclass
+
+HTTP_CACHE_TTL = _env_cache_ttl()
+
+# One pooled session for every outbound request so keep-alive connections
+# to resy.com / eater.com are reused; urllib3 handles retries with backoff.
+# The per-host pool is sized to the largest thread pool we run against it.
+_HTTP_WORKERS = 16
+_SESSION = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=_HTTP_WORKERS,
+    max_retries=Retry(
+        total=4,
+        backoff_factor=2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+    ),
+)
+_SESSION.mount("https://", _HTTP_ADAPTER)
+_SESSION.mount("http://", _HTTP_ADAPTER)
+atexit.register(_SESSION.close)
+
+
+@dataclass(slots=True)
 class Restaurant:
     name: str
     url: Optional[str] = None              # canonical details page (venue page or official site)
@@ -38,29 +82,47 @@ class Restaurant:
     booking_tip: str = "Book ahead when possible; aim for off-peak times."
     notes: Optional[str] = None
     action_text: Optional[str] = None      # e.g., "Walk-ins only" (suppresses big button when no reserve_url)
+    # Cached _norm_name(name); reset it to None whenever name is reassigned.
+    _key: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            self._key = _norm_name(self.name)
+        return self._key
 
 
 # ---------------------------
 # Basic helpers
 # ---------------------------
 
+_LEADING_NUM_RE = re.compile(r"^\s*\d+\s*[\.\)\-–—:]\s*")
+_LEADING_NUM_CAPTURE_RE = re.compile(r"^\s*(\d{1,3})\s*[\.\)\-–—:]\s*")
+
+
+@functools.lru_cache(maxsize=4096)
 def _strip_leading_numbering(name: str) -> str:
     if not name:
         return name
-    return re.sub(r"^\s*\d+\s*[\.\)\-–—:]\s*", "", name).strip()
+    return _LEADING_NUM_RE.sub("", name).strip()
 
 
 def _leading_num(text: str) -> Optional[int]:
-    m = re.match(r"^\s*(\d{1,3})\s*[\.\)\-–—:]\s*", text or "")
+    m = _LEADING_NUM_CAPTURE_RE.match(text or "")
     return int(m.group(1)) if m else None
 
 
+_APOS_TRANS = str.maketrans({"\u2019": "'"})
+_WS_RE = re.compile(r"\s+")
+_NAME_DROP_RE = re.compile(r"[^a-z0-9 '&-]+")
+
+
+@functools.lru_cache(maxsize=4096)
 def _norm_name(name: str) -> str:
     n = _strip_leading_numbering(name or "")
-    n = n.lower().strip()
-    n = re.sub(r"[\u2019’]", "'", n)
-    n = re.sub(r"\s+", " ", n)
-    n = re.sub(r"[^a-z0-9 '&-]", "", n)
+    n = n.lower().strip().translate(_APOS_TRANS)
+    n = _WS_RE.sub(" ", n)
+    n = _NAME_DROP_RE.sub("", n)
     return n
 
 
@@ -70,31 +132,105 @@ def _abs_url(base: str, href: Optional[str]) -> Optional[str]:
     return urljoin(base, href)
 
 
-def fetch_html(url: str, timeout: int = 45, retries: int = 4) -> str:
-    headers = {
-        "User-Agent": "nyc-heat-index-bot/3.6 (+https://github.com/)",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Connection": "close",
-    }
+_HTML_HEADERS = {
+    "User-Agent": "nyc-heat-index-bot/3.6 (+https://github.com/)",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Connection": "keep-alive",
+}
+
+
+# Upper bound on one page download; the source pages are a small fraction of this.
+_MAX_HTML_BYTES = 4 * 1024 * 1024
+
+
+def _read_capped(r: requests.Response) -> Tuple[bytes, bool]:
+    """Returns (body, truncated); the body is at most _MAX_HTML_BYTES."""
+    chunks: List[bytes] = []
+    total = 0
+    for chunk in r.iter_content(64 * 1024):
+        chunks.append(chunk)
+        total += len(chunk)
+        # Strictly over the cap: a page of exactly _MAX_HTML_BYTES is complete.
+        if total > _MAX_HTML_BYTES:
+            print(f"[Fetch] truncated at {_MAX_HTML_BYTES} bytes: {r.url}")
+            return b"".join(chunks)[:_MAX_HTML_BYTES], True
+    return b"".join(chunks), False
+
 
-    last_err: Optional[Exception] = None
-    for attempt in range(1, retries + 1):
+def fetch_html(url: str, timeout: int = 45) -> bytes:
+    # Raw bytes: the parser decodes once, honouring the page's own charset,
+    # instead of requests building a str that bs4 would re-encode for lxml.
+    with _SESSION.get(url, headers=_HTML_HEADERS, timeout=(15, timeout), stream=True) as r:
+        r.raise_for_status()
+        body, _ = _read_capped(r)
+        return body
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def fetch_html_cached(url: str, cache_dir: str, timeout: int = 45) -> bytes:
+    """
+    Like fetch_html, but keeps an on-disk copy: within HTTP_CACHE_TTL it is
+    returned as-is, after that it is revalidated using ETag / Last-Modified
+    so unchanged pages come back as a 304.
+    """
+    if HTTP_CACHE_DISABLED:
+        return fetch_html(url, timeout=timeout)
+
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    body_path = os.path.join(cache_dir, f"{key}.html")
+
+    cached: Optional[Dict] = None
+    if os.path.exists(meta_path) and os.path.exists(body_path):
         try:
-            r = requests.get(url, headers=headers, timeout=(15, timeout))
-            r.raise_for_status()
-            return r.text
-        except (requests.exceptions.ReadTimeout,
-                requests.exceptions.ConnectTimeout,
-                requests.exceptions.ConnectionError) as e:
-            last_err = e
-            sleep_s = min(60, (2 ** (attempt - 1)) * 2) + random.random()
-            print(f"Fetch failed ({attempt}/{retries}) for {url}: {e}. Retrying in {sleep_s:.1f}s")
-            time.sleep(sleep_s)
-
-    if last_err:
-        raise last_err
-    raise RuntimeError(f"Failed to fetch {url} for unknown reasons.")
+            with open(meta_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = None
+
+    if cached is not None and HTTP_CACHE_TTL > 0:
+        age = time.time() - os.path.getmtime(body_path)
+        if age < HTTP_CACHE_TTL:
+            print(f"[HttpCache] fresh ({int(age)}s old): {url}")
+            with open(body_path, "rb") as f:
+                return f.read()
+
+    headers = dict(_HTML_HEADERS)
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    with _SESSION.get(url, headers=headers, timeout=(15, timeout), stream=True) as r:
+        if r.status_code == 304 and cached is not None:
+            print(f"[HttpCache] not modified: {url}")
+            # Restart the TTL clock: the copy was just confirmed current.
+            os.utime(body_path)
+            with open(body_path, "rb") as f:
+                return f.read()
+        r.raise_for_status()
+        body, truncated = _read_capped(r)
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+
+    # Without validators the copy is only useful while it is within the TTL.
+    # A truncated body is never stored: its validators would pin it via 304s.
+    if truncated:
+        return body
+    if etag or last_modified or HTTP_CACHE_TTL > 0:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Body first, so a meta file never points at a missing or partial body.
+        _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps({"etag": etag, "last_modified": last_modified}).encode("utf-8"))
+    return body
 
 
 # ---------------------------
@@ -107,34 +243,47 @@ _BAD_NAME_FRAGMENTS = [
     "read more", "updated", "where to eat", "the hit list", "the heatmap",
 ]
 
-_REJECT_EXACT = {
+_REJECT_EXACT = frozenset({
     "about", "careers", "nearby restaurants", "top rated", "new on resy", "events",
     "features", "plans & pricing", "why resy os", "request a demo", "resy help desk",
     "global privacy policy", "terms of service", "cookie policy", "accessibility statement",
     "resy os overview", "resy os dashboard", "for restaurants", "resy", "get resy emails",
     "the resy credit", "global dining access", "discover more", "craving something else",
     "recommended", "you might also like", "related",
-}
+})
+
+_BAD_NAME_FRAGMENTS_RE = re.compile("|".join(re.escape(f) for f in _BAD_NAME_FRAGMENTS))
+_MONTH_DAY_RE = re.compile(r"^(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}$")
+_NUMERIC_ONLY_RE = re.compile(r"[0-9\s\-/,:.]+")
 
 
 def _looks_like_restaurant_name(name: str) -> bool:
-    if not name:
-        return False
-    n = _strip_leading_numbering(name.strip())
-    if len(n) < 2 or len(n) > 90:
+    # Stripping the numbering only ever shortens the name, so reject tiny
+    # strings before paying for the regex.
+    if not name or len(name) < 2:
         return False
 
-    low = n.lower()
-    if low in _REJECT_EXACT:
+    # Most rejected headings ("See more", "Related", ...) carry no numbering, so
+    # try the set and fragment checks on the raw text first. No fragment starts
+    # with a digit or punctuation, so a fragment match can't depend on the prefix.
+    raw = name.strip()
+    low = raw.lower()
+    if low in _REJECT_EXACT or _BAD_NAME_FRAGMENTS_RE.search(low):
         return False
 
-    if any(bad in low for bad in _BAD_NAME_FRAGMENTS):
+    n = _strip_leading_numbering(raw)
+    if len(n) < 2 or len(n) > 90:
         return False
 
-    if re.match(r"^(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2}$", low):
+    if len(n) != len(raw):
+        low = n.lower()
+        if low in _REJECT_EXACT:
+            return False
+
+    if _MONTH_DAY_RE.match(low):
         return False
 
-    if re.fullmatch(r"[0-9\s\-/,:.]+", n):
+    if _NUMERIC_ONLY_RE.fullmatch(n):
         return False
 
     return True
@@ -144,235 +293,217 @@ def _looks_like_restaurant_name(name: str) -> bool:
 # Image helpers
 # ---------------------------
 
+def _last_srcset_url(srcset: str) -> Optional[str]:
+    # Only the last (largest) candidate is ever used, so peel entries off the
+    # end instead of splitting the whole attribute.
+    rest = srcset
+    while rest:
+        rest, _, part = rest.rpartition(",")
+        url = part.strip().split(" ")[0].strip()
+        if url:
+            return url
+    return None
+
+
+_IMG_SRC_ATTRS = ("src", "data-src", "data-lazy-src", "data-original", "data-url")
+_IMG_SRCSET_ATTRS = ("srcset", "data-srcset")
+
+
 def _img_src_from_tag(img: Tag) -> Optional[str]:
-    for attr in ("src", "data-src", "data-lazy-src", "data-original", "data-url"):
-        v = img.get(attr)
+    attrs = img.attrs
+    for attr in _IMG_SRC_ATTRS:
+        v = attrs.get(attr)
         if v:
             return v.strip()
 
-    srcset = img.get("srcset") or img.get("data-srcset")
-    if srcset:
-        candidates: List[str] = []
-        for part in srcset.split(","):
-            url = part.strip().split(" ")[0].strip()
-            if url:
-                candidates.append(url)
-        if candidates:
-            return candidates[-1]
+    for attr in _IMG_SRCSET_ATTRS:
+        srcset = attrs.get(attr)
+        if srcset:
+            return _last_srcset_url(srcset)
     return None
 
 
 def _best_src_from_img(img: Tag) -> Optional[str]:
     srcset = img.get("srcset")
     if srcset:
-        candidates: List[str] = []
-        for part in srcset.split(","):
-            url = part.strip().split(" ")[0].strip()
-            if url:
-                candidates.append(url)
-        if candidates:
-            return candidates[-1]
+        url = _last_srcset_url(srcset)
+        if url:
+            return url
     return _img_src_from_tag(img)
 
 
 def _src_from_source_tag(source: Tag) -> Optional[str]:
-    srcset = source.get("srcset") or source.get("data-srcset")
-    if not srcset:
-        return None
-    candidates: List[str] = []
-    for part in srcset.split(","):
-        url = part.strip().split(" ")[0].strip()
-        if url:
-            candidates.append(url)
-    return candidates[-1] if candidates else None
+    attrs = source.attrs
+    for attr in _IMG_SRCSET_ATTRS:
+        srcset = attrs.get(attr)
+        if srcset:
+            return _last_srcset_url(srcset)
+    return None
 
 
-_EATER_STOP_WORDS = {"see more", "related", "more maps", "more maps in eater ny", "you might also like"}
+_EATER_STOP_WORDS = frozenset({"see more", "related", "more maps", "more maps in eater ny", "you might also like"})
+_EATER_STOP_RE = re.compile("|".join(re.escape(w) for w in sorted(_EATER_STOP_WORDS, key=len, reverse=True)))
 
 
-def _hit_stop_boundary(node: Tag) -> bool:
-    if node.name in ("aside", "footer", "nav"):
-        return True
-    txt = node.get_text(" ", strip=True).lower() if isinstance(node, Tag) else ""
-    return any(w in txt for w in _EATER_STOP_WORDS)
+_STOP_TAGS = ("aside", "footer", "nav")
+# bs4 leaves these tags' strings out of their parent's get_text(), so a clean
+# parent says nothing about them.
+_OWN_TEXT_TAGS = ("script", "style", "template", "rt", "rp")
 
 
-def _pick_image_from_slice(
-    nodes: List[Tag],
-    base_url: str,
-    restaurant_name: str,
-    *,
-    max_tags_to_scan: int = 260,
-    stop_on_modules: bool = True,
-) -> Optional[str]:
-    name_norm = _norm_name(restaurant_name)
-    candidates: List[Tuple[int, str]] = []
+def _hit_stop_boundary(name: str, low_text: str) -> bool:
+    return name in _STOP_TAGS or _EATER_STOP_RE.search(low_text) is not None
 
-    def score_url(u: str, alt: str) -> int:
-        u_low = u.lower()
-        alt_norm = _norm_name(alt or "")
-        score = 0
 
-        # Prefer Vox/Eater upload domains heavily (alts often describe dishes, not restaurant)
-        if ("platform.ny.eater.com/wp-content/uploads/" in u_low or
-            "platform.eater.com/wp-content/uploads/" in u_low or
-            "cdn.vox-cdn.com" in u_low):
-            score += 80
+_EATER_IMG_HOST_RE = re.compile(
+    r"platform\.ny\.eater\.com/wp-content/uploads/|platform\.eater\.com/wp-content/uploads/|cdn\.vox-cdn\.com"
+)
+_BAD_IMG_RE = re.compile(r"logo|icon|avatar|spinner|placeholder|sprite")
 
-        # Hard reject Resy social preview junk
-        if "s3.amazonaws.com/resy.com/images/social/" in u_low or "facebook-preview" in u_low:
-            score -= 5000
 
-        if name_norm and name_norm in alt_norm:
-            score += 30
+def _score_eater_image(u: str, alt: str, name_norm: str) -> int:
+    u_low = u.lower()
+    alt_norm = _norm_name(alt or "")
+    score = 0
 
-        if any(bad in u_low for bad in ["logo", "icon", "avatar", "spinner", "placeholder", "sprite"]):
-            score -= 40
-        if u_low.endswith(".svg"):
-            score -= 30
+    # Prefer Vox/Eater upload domains heavily (alts often describe dishes, not restaurant)
+    if _EATER_IMG_HOST_RE.search(u_low):
+        score += 80
 
-        return score
+    # Hard reject Resy social preview junk
+    if "s3.amazonaws.com/resy.com/images/social/" in u_low or "facebook-preview" in u_low:
+        score -= 5000
 
-    scanned = 0
-    for node in nodes:
-        if not isinstance(node, Tag):
-            continue
-        scanned += 1
-        if scanned > max_tags_to_scan:
-            break
-        if stop_on_modules and _hit_stop_boundary(node):
-            break
-
-        pic = node.find("picture")
-        if pic:
-            src = pic.find("source")
-            if src:
-                u = _src_from_source_tag(src)
-                if u:
-                    u2 = _abs_url(base_url, u)
-                    if u2:
-                        candidates.append((score_url(u2, ""), u2))
-
-        for img in node.find_all("img"):
-            u = _img_src_from_tag(img)
-            if not u:
-                continue
-            u2 = _abs_url(base_url, u)
-            if not u2:
-                continue
-            alt = img.get("alt", "") or ""
-            candidates.append((score_url(u2, alt), u2))
-
-    if not candidates:
-        return None
-    candidates.sort(key=lambda x: x[0], reverse=True)
-    return candidates[0][1]
+    if name_norm and name_norm in alt_norm:
+        score += 30
+
+    if _BAD_IMG_RE.search(u_low):
+        score -= 40
+    if u_low.endswith(".svg"):
+        score -= 30
+
+    return score
 
 
 # ---------------------------
 # Eater: Walk-ins + link precedence
 # ---------------------------
 
-def _extract_walkins_only(nodes: List[Tag]) -> bool:
-    text_blob = " ".join([n.get_text(" ", strip=True) for n in nodes if isinstance(n, Tag)]).lower()
-    patterns = [
-        "walk ins only", "walk-ins only", "walk in only", "walk-in only",
-        "walkins only",
-    ]
-    return any(p in text_blob for p in patterns)
+# "walk ins only", "walk-ins only", "walk in only", "walk-in only", "walkins only"
+_WALKINS_RE = re.compile(r"walk(?:[ -]ins?|ins) only")
+
+
+_BOOKING_DOMAIN_RE = re.compile(r"resy\.com|opentable\.com|exploretock\.com|reservations\.safegraph\.com")
+_BOOKING_LABEL_RE = re.compile(r"book|reserve|table")
+_MAPS_RE = re.compile(r"google\.com/maps|maps\.google\.com")
 
 
-def _pick_eater_links(nodes: List[Tag], base_url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+def _classify_eater_link(
+    a: Tag,
+    base_url: str,
+    *,
+    want_website: bool = True,
+    want_reserve: bool = True,
+) -> Tuple[Optional[str], Optional[str]]:
     """
-    Returns (reserve_url, website_url, venue_url)
+    Returns (slot, url) where slot is "reserve", "website", "venue" or None.
 
     Rules:
-    - reserve_url: only if domain is booking-ish AND link label looks like booking
-    - website_url: explicit "Visit website" (or "Website")
-    - venue_url: ny.eater.com/venue/ link
+    - reserve: only if domain is booking-ish AND link label looks like booking
+    - website: explicit "Visit website" (or "Website")
+    - venue: ny.eater.com/venue/ link
     - ignore Google Maps links for canonical links
-    """
-    reserve_url = None
-    website_url = None
-    venue_url = None
-
-    for node in nodes:
-        if not isinstance(node, Tag):
-            continue
 
-        for a in node.find_all("a", href=True):
-            href = _abs_url(base_url, a["href"])
-            if not href or not href.startswith("http"):
-                continue
+    want_website/want_reserve say which slots are still empty; the link label
+    is only read when it could still fill one of them.
+    """
+    href = _abs_url(base_url, a["href"])
+    if not href or not href.startswith("http"):
+        return None, None
 
-            hlow = href.lower()
-            text = a.get_text(" ", strip=True).lower()
-            aria = (a.get("aria-label") or "").lower()
+    hlow = href.lower()
 
-            # Venue
-            if "ny.eater.com/venue/" in hlow:
-                venue_url = venue_url or href
-                continue
+    # Venue
+    if "ny.eater.com/venue/" in hlow:
+        return "venue", href
 
-            # Explicit “Visit website”
-            if "visit website" in text or text == "website":
-                website_url = website_url or href
-                continue
+    is_booking_domain = _BOOKING_DOMAIN_RE.search(hlow) is not None
+    if not want_website and not (want_reserve and is_booking_domain):
+        return None, None
 
-            # Never treat maps as primary details
-            if "google.com/maps" in hlow or "maps.google.com" in hlow:
-                continue
+    text = a.get_text(" ", strip=True).lower()
 
-            # Booking: only if booking-ish domain AND label indicates booking
-            is_booking_domain = any(x in hlow for x in [
-                "resy.com", "opentable.com", "exploretock.com", "reservations.safegraph.com"
-            ])
-            looks_like_booking = any(k in text for k in ["book", "reserve", "table"]) or any(k in aria for k in ["book", "reserve", "table"])
+    # Explicit “Visit website”
+    if "visit website" in text or text == "website":
+        return "website", href
 
-            if is_booking_domain and looks_like_booking:
-                reserve_url = reserve_url or href
-                continue
+    # Never treat maps as primary details
+    if _MAPS_RE.search(hlow):
+        return None, None
 
-    return reserve_url, website_url, venue_url
+    # Booking: only if booking-ish domain AND label indicates booking
+    if is_booking_domain and (
+        _BOOKING_LABEL_RE.search(text) or _BOOKING_LABEL_RE.search((a.get("aria-label") or "").lower())
+    ):
+        return "reserve", href
+    return None, None
 
 
 # ---------------------------
 # Resy: Hit List extractor based on article.venue2 blocks
 # ---------------------------
 
-def extract_resy_hit_list(html: str) -> List[Restaurant]:
+# Compiled once; soup.select() re-resolves the selector string on every call.
+_SEL_VENUE2 = sv.compile("article.venue2")
+_SEL_GRID2_ARTICLE = sv.compile(".grid2-entry article")
+_SEL_VENUE2_NAME = sv.compile(".venue2-name")
+_SEL_VENUE2_LOCATION = sv.compile(".venue2-location")
+_SEL_VENUE2_LEAD = sv.compile(".venue2-lead p")
+_SEL_VENUE2_LINK = sv.compile(".venue2-title a[href]")
+_SEL_VENUE2_IMG = sv.compile("figure.venue2-image img")
+
+
+def _resy_keep_tag(name: str, attrs: Dict) -> bool:
+    if name == "article":
+        return True
+    cls = attrs.get("class") or ""
+    return "grid2-entry" in (cls.split() if isinstance(cls, str) else cls)
+
+
+# Everything the extractor reads lives inside an <article> (or a .grid2-entry
+# wrapper for the fallback selector), so only those subtrees are built.
+_RESY_STRAINER = SoupStrainer(_resy_keep_tag)
+
+
+def extract_resy_hit_list(html: bytes) -> List[Restaurant]:
     base_url = "https://blog.resy.com"
-    soup = BeautifulSoup(html, "lxml")
+    soup = BeautifulSoup(html, "lxml", parse_only=_RESY_STRAINER)
 
     restaurants: List[Restaurant] = []
 
     # Hit List numbered entries are rendered as <article class="venue2">
-    articles = soup.select("article.venue2")
+    articles = _SEL_VENUE2.select(soup)
     if not articles:
-        articles = soup.select(".grid2-entry article")
+        articles = _SEL_GRID2_ARTICLE.select(soup)
 
+    # select() only ever yields Tags
     for art in articles:
-        if not isinstance(art, Tag):
-            continue
-
-        name_tag = art.select_one(".venue2-name")
+        name_tag = _SEL_VENUE2_NAME.select_one(art)
         if not name_tag:
             continue
         name = _strip_leading_numbering(name_tag.get_text(" ", strip=True))
         if not _looks_like_restaurant_name(name):
             continue
-        if name.lower() in _REJECT_EXACT:
-            continue
 
         # Neighborhood
         neighborhood = None
-        loc = art.select_one(".venue2-location")
+        loc = _SEL_VENUE2_LOCATION.select_one(art)
         if loc:
             neighborhood = loc.get_text(" ", strip=True) or None
 
         # Blurb
         why = None
-        lead = art.select_one(".venue2-lead p")
+        lead = _SEL_VENUE2_LEAD.select_one(art)
         if lead:
             txt = lead.get_text(" ", strip=True)
             if txt and len(txt) >= 40:
@@ -380,7 +511,7 @@ def extract_resy_hit_list(html: str) -> List[Restaurant]:
 
         # Reserve URL: prefer the venue link in the title (booking-button href is often empty)
         reserve_url = None
-        a_venue = art.select_one(".venue2-title a[href]")
+        a_venue = _SEL_VENUE2_LINK.select_one(art)
         if a_venue:
             href = (a_venue.get("href") or "").strip()
             if href.startswith("http"):
@@ -388,7 +519,7 @@ def extract_resy_hit_list(html: str) -> List[Restaurant]:
 
         # Image: only if it is inside the same article
         image_url = None
-        img = art.select_one("figure.venue2-image img")
+        img = _SEL_VENUE2_IMG.select_one(art)
         if img:
             src = _best_src_from_img(img)
             if src:
@@ -417,17 +548,123 @@ def extract_resy_hit_list(html: str) -> List[Restaurant]:
 # Eater extractor
 # ---------------------------
 
-def _collect_between(start: Tag, end: Optional[Tag]) -> List[Tag]:
-    nodes: List[Tag] = []
-    for el in start.next_elements:
-        if el is end:
-            break
-        if isinstance(el, Tag):
-            nodes.append(el)
-    return nodes
+# An entry is a heading plus a few paragraphs/links/images; anything longer is
+# page chrome (e.g. the last entry running on into the footer).
+_MAX_SLICE_TAGS = 260
+
 
+def _collect_between(all_tags: List[Tag], order: Dict[int, int], start: Tag, end: Optional[Tag]) -> List[Tag]:
+    # all_tags is every tag in document order (order maps id(tag) -> index), so
+    # the tags after start and before end are a plain list slice.
+    lo = order[id(start)] + 1
+    hi = order[id(end)] if end is not None else len(all_tags)
+    return all_tags[lo:min(hi, lo + _MAX_SLICE_TAGS)]
 
-def extract_eater_heatmap(html: str) -> List[Restaurant]:
+
+@dataclass(slots=True)
+class _EaterEntry:
+    why_hot: Optional[str] = None
+    image_url: Optional[str] = None
+    reserve_url: Optional[str] = None
+    website_url: Optional[str] = None
+    venue_url: Optional[str] = None
+    walkins_only: bool = False
+
+
+def _scan_eater_slice(nodes: List[Tag], base_url: str, restaurant_name: str) -> _EaterEntry:
+    """
+    One pass over an entry's slice for everything the card needs: the blurb,
+    the best image, the reserve/website/venue links and the walk-ins flag.
+    """
+    out = _EaterEntry()
+    name_norm = _norm_name(restaurant_name)
+
+    # Image state. The image scan ends at the first stop module ("See more",
+    # <aside>, ...), the other fields keep reading to the next heading.
+    best: Optional[Tuple[int, str]] = None
+    # Best score _score_eater_image can award; once reached no later image can win.
+    max_score = 80 + (30 if name_norm else 0)
+    image_done = False
+    clean_ids = set()
+
+    # A descendant's text is part of its top-level ancestor's, except under the
+    # _OWN_TEXT_TAGS; those plus the top-level texts, joined once, cover the slice
+    # for the walk-ins phrases, including phrases split across sibling tags.
+    in_slice = set()
+    walkins_parts: List[str] = []
+
+    for node in nodes:
+        name = node.name
+        in_slice.add(id(node))
+        # get_text() walks the whole subtree; the stop check, the blurb and the
+        # walk-ins check share one result per tag.
+        txt: Optional[str] = None
+        low: Optional[str] = None
+
+        if not image_done:
+            # A tag's text is a substring of its parent's, so once a parent has been
+            # checked clean its children only need the cheap tag-name test.
+            if id(node.parent) in clean_ids and name not in _OWN_TEXT_TAGS:
+                image_done = name in _STOP_TAGS
+            else:
+                txt = node.get_text(" ", strip=True)
+                low = txt.lower()
+                image_done = _hit_stop_boundary(name, low)
+            if not image_done:
+                clean_ids.add(id(node))
+                u = None
+                alt = ""
+                if name == "picture":
+                    src = node.find("source")
+                    u = _src_from_source_tag(src) if src else None
+                elif name == "img":
+                    u = _img_src_from_tag(node)
+                    alt = node.get("alt", "") or ""
+                u2 = _abs_url(base_url, u) if u else None
+                if u2:
+                    score = _score_eater_image(u2, alt, name_norm)
+                    # Strictly greater keeps the earliest of equally scored images
+                    if best is None or score > best[0]:
+                        best = (score, u2)
+                        image_done = score >= max_score
+
+        # why_hot: first substantial paragraph after heading
+        if out.why_hot is None and name == "p":
+            if txt is None:
+                txt = node.get_text(" ", strip=True)
+            if len(txt) >= 40:
+                out.why_hot = txt
+
+        # First hit wins for each link slot
+        if name == "a" and node.has_attr("href"):
+            slot, href = _classify_eater_link(
+                node,
+                base_url,
+                want_website=out.website_url is None,
+                want_reserve=out.reserve_url is None,
+            )
+            if slot == "venue":
+                out.venue_url = out.venue_url or href
+            elif slot == "website":
+                out.website_url = out.website_url or href
+            elif slot == "reserve":
+                out.reserve_url = out.reserve_url or href
+
+        if id(node.parent) not in in_slice or name in _OWN_TEXT_TAGS:
+            if low is None:
+                low = (txt if txt is not None else node.get_text(" ", strip=True)).lower()
+            walkins_parts.append(low)
+
+    out.walkins_only = _WALKINS_RE.search(" ".join(walkins_parts)) is not None
+    out.image_url = best[1] if best else None
+    return out
+
+
+# Module headings that sit between map entries ("See more", "More maps in Eater NY", ...)
+_EATER_SKIP_HEADING_RE = re.compile(r"^see more$|^more maps|related|updates")
+
+
+def extract_eater_heatmap(html: bytes) -> List[Restaurant]:
     base_url = "https://ny.eater.com"
     soup = BeautifulSoup(html, "lxml")
     article = soup.find("article") or soup.find("main") or soup
@@ -435,57 +672,37 @@ def extract_eater_heatmap(html: str) -> List[Restaurant]:
     restaurants: List[Restaurant] = []
     headings = article.find_all(["h2", "h3"])
 
+    all_tags = soup.find_all(True)
+    order = {id(t): i for i, t in enumerate(all_tags)}
+
     for i, h in enumerate(headings):
         title = _strip_leading_numbering(h.get_text(" ", strip=True))
         if not _looks_like_restaurant_name(title):
             continue
 
-        low = title.lower()
-        if low in ("see more", "more maps in eater ny") or low.startswith("more maps"):
-            continue
-        if any(k in low for k in ["related", "updates"]):
+        if _EATER_SKIP_HEADING_RE.search(title.lower()):
             continue
 
         name = title
         end = headings[i + 1] if i + 1 < len(headings) else None
-        nodes = _collect_between(h, end)
+        nodes = _collect_between(all_tags, order, h, end)
 
-        # why_hot: first substantial paragraph after heading
-        why = None
-        for node in nodes:
-            if not isinstance(node, Tag):
-                continue
-            p = node if node.name == "p" else node.find("p")
-            if p:
-                txt = p.get_text(" ", strip=True)
-                if txt and len(txt) >= 40:
-                    why = txt
-                    break
-
-        image_url = _pick_image_from_slice(
-            nodes,
-            base_url=base_url,
-            restaurant_name=name,
-            max_tags_to_scan=260,
-            stop_on_modules=True,
-        )
-
-        reserve_url, website_url, venue_url = _pick_eater_links(nodes, base_url=base_url)
+        entry = _scan_eater_slice(nodes, base_url=base_url, restaurant_name=name)
+        reserve_url = entry.reserve_url
 
         # Canonical details url (non-booking):
-        canonical_url = venue_url or website_url or reserve_url
+        canonical_url = entry.venue_url or entry.website_url or reserve_url
 
-        walkins_only = _extract_walkins_only(nodes)
         action_text = None
-        if walkins_only and not reserve_url:
+        if entry.walkins_only and not reserve_url:
             action_text = "Walk-ins only"
 
         restaurants.append(Restaurant(
             name=name,
             url=canonical_url,
             reserve_url=reserve_url,
-            image_url=image_url,
-            why_hot=why,
+            image_url=entry.image_url,
+            why_hot=entry.why_hot,
             sources=["Eater"],
             action_text=action_text,
         ))
@@ -502,16 +719,23 @@ def dedupe(items: List[Restaurant]) -> List[Restaurant]:
 
     for r in items:
         r.name = _strip_leading_numbering(r.name)
-        key = _norm_name(r.name)
+        r._key = None
+        key = r.key
         if not key:
             continue
 
-        if key not in seen:
+        e = seen.get(key)
+        if e is None:
             seen[key] = r
             continue
 
-        e = seen[key]
-        e.sources = sorted(list(set((e.sources or []) + (r.sources or []))))
+        # Only a handful of sources exist, so a list scan beats building a set
+        merged_sources = e.sources if e.sources is not None else []
+        for src in r.sources or ():
+            if src not in merged_sources:
+                merged_sources.append(src)
+        merged_sources.sort()
+        e.sources = merged_sources
 
         # booking link: keep first non-empty (prefer exists)
         e.reserve_url = e.reserve_url or r.reserve_url
@@ -550,29 +774,50 @@ def load_state(path: str) -> Dict:
     if not os.path.exists(path):
         return {"last_month_names": []}
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return json.loads(f.read())
 
 
 def save_state(path: str, names: List[str]) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Serialise in one go and write once; json.dump issues a write per token.
+    # Indented because state.json is committed and read in diffs.
+    payload = json.dumps({"last_month_names": names}, indent=2)
     with open(path, "w", encoding="utf-8") as f:
-        json.dump({"last_month_names": names}, f, indent=2)
+        f.write(payload)
+
+
+def _compile_keyword_buckets(buckets: Dict[int, List[str]]) -> List[Tuple[int, Pattern]]:
+    # One alternation per bucket, highest score first: a single regex scan replaces
+    # a substring test per keyword, and the first bucket that hits is the answer.
+    return [
+        (score, re.compile("|".join(re.escape(kw) for kw in buckets[score])))
+        for score in sorted(buckets, reverse=True)
+        if buckets[score]
+    ]
+
 
+_INTENSITY_PATTERNS = _compile_keyword_buckets(INTENSITY_KEYWORDS)
+_SCARCITY_PATTERNS = _compile_keyword_buckets(SCARCITY_KEYWORDS)
 
-def keyword_score(text: str, buckets: Dict[int, List[str]], max_score: int) -> int:
+
+def keyword_score(text: str, patterns: List[Tuple[int, Pattern]], max_score: int) -> int:
+    # text must already be lower-cased (compute_heat lowers why_hot once)
     if not text:
         return 0
-    t = text.lower()
-    best = 0
-    for score, kws in buckets.items():
-        for kw in kws:
-            if kw in t:
-                best = max(best, score)
-    return min(best, max_score)
+    for score, rx in patterns:
+        if rx.search(text):
+            return min(score, max_score)
+    return 0
+
 
+_BRUTAL_RE = re.compile(r"impossible|sold out|months out|hardest|booked up")
+_HARD_RE = re.compile(r"hard to book|tough reservation|set your alarm|reservation release|drops")
+_EASY_RE = re.compile(r"walk-in friendly|plenty of seats|easy to book|no problem getting in")
 
-def reservation_intel(r: Restaurant) -> Tuple[str, str]:
-    text = (r.why_hot or "").lower()
+
+def reservation_intel(r: Restaurant, text: Optional[str] = None) -> Tuple[str, str]:
+    if text is None:
+        text = (r.why_hot or "").lower()
 
     platform = None
     target = r.reserve_url or r.url or ""
@@ -583,15 +828,11 @@ def reservation_intel(r: Restaurant) -> Tuple[str, str]:
     elif "exploretock.com" in target:
         platform = "Tock"
 
-    brutal = any(k in text for k in ["impossible", "sold out", "months out", "hardest", "booked up"])
-    hard = any(k in text for k in ["hard to book", "tough reservation", "set your alarm", "reservation release", "drops"])
-    easy = any(k in text for k in ["walk-in friendly", "plenty of seats", "easy to book", "no problem getting in"])
-
-    if brutal:
+    if _BRUTAL_RE.search(text):
         diff = "Brutal"
-    elif hard:
+    elif _HARD_RE.search(text):
         diff = "Hard"
-    elif easy:
+    elif _EASY_RE.search(text):
         diff = "Easy"
     else:
         diff = "Moderate"
@@ -616,25 +857,27 @@ def compute_heat(restaurants: List[Restaurant], last_month_names: List[str]) ->
     last_set = set(_norm_name(n) for n in last_month_names)
 
     for r in restaurants:
-        srcs = set((r.sources or []))
+        srcs = r.sources or ()  # at most two entries; membership on the list is enough
         score = 0
 
         if "Resy" in srcs and "Eater" in srcs:
             score += WEIGHTS["both_sources_bonus"]
 
-        if _norm_name(r.name) in last_set:
+        if r.key in last_set:
             score += WEIGHTS["carried_over_bonus"]
         else:
             score += WEIGHTS["new_this_month_bonus"]
 
-        why = r.why_hot or ""
-        score += keyword_score(why, INTENSITY_KEYWORDS, WEIGHTS["language_intensity_max"])
-        score += keyword_score(why, SCARCITY_KEYWORDS, WEIGHTS["reservation_scarcity_max"])
+        # Lower-case the blurb once and share it across all keyword checks
+        why = (r.why_hot or "").lower()
+        score += keyword_score(why, _INTENSITY_PATTERNS, WEIGHTS["language_intensity_max"])
+        score += keyword_score(why, _SCARCITY_PATTERNS, WEIGHTS["reservation_scarcity_max"])
 
         r.heat_score = max(0, min(100, int(score)))
-        r.res_difficulty, r.booking_tip = reservation_intel(r)
+        r.res_difficulty, r.booking_tip = reservation_intel(r, why)
 
-    restaurants.sort(key=lambda x: x.heat_score, reverse=True)
+    # Stable sort: ties keep their dedupe (source page) order.
+    restaurants.sort(key=attrgetter("heat_score"), reverse=True)
 
 
 # ---------------------------
@@ -642,8 +885,9 @@ def compute_heat(restaurants: List[Restaurant], last_month_names: List[str]) ->
 # ---------------------------
 
 def _slugify(s: str) -> str:
-    s = _norm_name(s)
-    s = re.sub(r"\s+", "-", s).strip("-")
+    # split() rather than replace(" ", "-"): dropping characters in _norm_name
+    # can leave double spaces ("joe & ! co").
+    s = "-".join(_norm_name(s).split()).strip("-")
     return s[:80] or "img"
 
 
@@ -654,13 +898,17 @@ def _cache_remote_image(url: str, out_path: str) -> bool:
             "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
             "Referer": "https://blog.resy.com/",
         }
-        r = requests.get(url, headers=headers, timeout=(15, 45), allow_redirects=True)
+        r = _SESSION.get(url, headers=headers, timeout=(15, 45), allow_redirects=True)
         if r.status_code != 200 or not r.content:
             return False
 
+        # A file at out_path is trusted as complete on later runs, so never
+        # leave a partial one there.
         os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        with open(out_path, "wb") as f:
+        tmp_path = out_path + ".part"
+        with open(tmp_path, "wb") as f:
             f.write(r.content)
+        os.replace(tmp_path, out_path)
         return True
     except Exception:
         return False
@@ -668,8 +916,7 @@ def _cache_remote_image(url: str, out_path: str) -> bool:
 
 def cache_resy_images_for_pages(restaurants: List[Restaurant], dist_dir: str) -> None:
     assets_dir = os.path.join(dist_dir, "assets")
-    cached = 0
-    attempted = 0
+    jobs: List[Tuple[Restaurant, str, str]] = []
 
     for r in restaurants:
         if not r.sources or "Resy" not in r.sources:
@@ -684,15 +931,36 @@ def cache_resy_images_for_pages(restaurants: List[Restaurant], dist_dir: str) ->
         if not (u_low.startswith("https://image.resy.com/") or "blog.resy.com/wp-content/uploads/" in u_low):
             continue
 
-        attempted += 1
         ext = ".jpg"
         if u_low.endswith(".png"):
             ext = ".png"
-        fname = f"resy-{_slugify(r.name)}{ext}"
-        out_path = os.path.join(assets_dir, fname)
+        # Named after a hash of the source URL: a file already on disk is this exact
+        # image, and a new upstream image gets a new name instead of overwriting.
+        url_key = hashlib.blake2b(r.image_url.encode("utf-8"), digest_size=8).hexdigest()
+        fname = f"resy-{_slugify(r.name)}-{url_key}{ext}"
+        jobs.append((r, r.image_url, fname))
+
+    ok_by_fname: Dict[str, bool] = {}
+    todo: List[Tuple[Restaurant, str, str]] = []
+    for job in jobs:
+        if os.path.exists(os.path.join(assets_dir, job[2])):
+            ok_by_fname[job[2]] = True
+        else:
+            todo.append(job)
+
+    # Downloads are independent, so overlap them; results are applied below on
+    # this thread so Restaurant fields are never mutated from a worker.
+    with ThreadPoolExecutor(max_workers=_HTTP_WORKERS) as ex:
+        results = ex.map(
+            lambda job: _cache_remote_image(job[1], os.path.join(assets_dir, job[2])),
+            todo,
+        )
+        for job, ok in zip(todo, results):
+            ok_by_fname[job[2]] = ok
 
-        ok = _cache_remote_image(r.image_url, out_path)
-        if ok:
+    cached = 0
+    for r, _, fname in jobs:
+        if ok_by_fname[fname]:
             cached += 1
             if PUBLIC_BASE_URL:
                 r.image_url = f"{PUBLIC_BASE_URL}/assets/{fname}"
@@ -701,14 +969,29 @@ def cache_resy_images_for_pages(restaurants: List[Restaurant], dist_dir: str) ->
         else:
             r.image_url = DEFAULT_RESY_IMAGE or None
 
-    print(f"[ResyCache] attempted={attempted} cached={cached} public_base_set={bool(PUBLIC_BASE_URL)}")
+    print(
+        f"[ResyCache] attempted={len(todo)} reused={len(jobs) - len(todo)} "
+        f"cached={cached} public_base_set={bool(PUBLIC_BASE_URL)}"
+    )
 
 
 # ---------------------------
 # Render + email
 # ---------------------------
 
-def render_newsletter(output_dir: str, restaurants: List[Restaurant]) -> Tuple[str, str]:
+# Built once per process; templates don't change while we run, so skip mtime checks.
+# Compiled template bytecode is also kept on disk so later runs skip the compile;
+# Jinja's default cache directory is per-user, mode 0700 and ownership-checked.
+_JINJA_ENV = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), "..", "templates")),
+    autoescape=select_autoescape(["html", "xml"]),
+    auto_reload=False,
+    bytecode_cache=FileSystemBytecodeCache(),
+)
+_TEMPLATE = _JINJA_ENV.get_template("newsletter.html.j2")
+
+
+def render_newsletter(output_dir: str, restaurants: List[Restaurant]) -> Tuple[str, str, str]:
     tz_name = os.environ.get("TIMEZONE") or "America/New_York"
     local_tz = tz.gettz(tz_name)
 
@@ -716,17 +999,11 @@ def render_newsletter(output_dir: str, restaurants: List[Restaurant]) -> Tuple[s
     month_label = now_local.strftime("%B %Y")
     title = f"NYC Heat Index — {month_label}"
 
-    env = Environment(
-        loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), "..", "templates")),
-        autoescape=select_autoescape(["html", "xml"]),
-    )
-    tpl = env.get_template("newsletter.html.j2")
-
-    html = tpl.render(
+    html = _TEMPLATE.render(
         title=title,
         period_label=month_label,
         generated_at=now_local.strftime("%Y-%m-%d %H:%M %Z"),
-        restaurants=[asdict(r) for r in restaurants],
+        restaurants=restaurants,
         sources=[{"name": s.name, "url": s.url} for s in SOURCES],
     )
 
@@ -735,12 +1012,25 @@ def render_newsletter(output_dir: str, restaurants: List[Restaurant]) -> Tuple[s
     out_path = os.path.join(output_dir, f"issue-{issue_slug}.html")
     index_path = os.path.join(output_dir, "index.html")
 
-    with open(index_path, "w", encoding="utf-8") as f:
-        f.write(html)
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(html)
+    # Written aside and swapped in, so a failed run never leaves a truncated issue.
+    _write_atomic(out_path, html.encode("utf-8"))
+
+    # index.html is the same page; link it to the issue instead of writing it twice.
+    # Unlink first so an older issue it was linked to is left untouched.
+    if os.path.lexists(index_path):
+        os.remove(index_path)
+    try:
+        os.link(out_path, index_path)
+    except OSError:
+        shutil.copyfile(out_path, index_path)
+
+    return title, out_path, html
 
-    return title, out_path
+
+# The body is mostly ASCII markup; quoted-printable keeps it close to its real
+# size where base64 would add a third.
+_QP_UTF8 = Charset("utf-8")
+_QP_UTF8.body_encoding = QP
 
 
 def send_email(subject: str, html_body: str) -> None:
@@ -761,56 +1051,93 @@ def send_email(subject: str, html_body: str) -> None:
 
     port_raw = (os.environ.get("SMTP_PORT") or "").strip()
     port = int(port_raw) if port_raw else 587
+    # Recipients per SMTP transaction; large single-envelope lists get throttled.
+    batch_raw = (os.environ.get("SMTP_BATCH_SIZE") or "").strip()
+    batch_size = max(1, int(batch_raw)) if batch_raw else 50
 
     from_email = (os.environ.get("FROM_EMAIL") or username).strip()
     from_name = (os.environ.get("FROM_NAME") or "NYC Heat Index").strip()
     reply_to = (os.environ.get("REPLY_TO") or "").strip()
 
+    # Subscribers only go on the envelope (no Bcc header), so the same bytes
+    # can be sent to every batch.
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
     msg["From"] = f"{from_name} <{from_email}>"
     msg["To"] = from_email
-    msg["Bcc"] = ", ".join(subscribers)
     if reply_to:
         msg["Reply-To"] = reply_to
 
-    msg.attach(MIMEText(html_body, "html", "utf-8"))
+    msg.attach(MIMEText(html_body, "html", _QP_UTF8))
+    raw = msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
 
     context = ssl.create_default_context()
     with smtplib.SMTP(host, port) as server:
         server.starttls(context=context)
         server.login(username, password)
-        server.sendmail(from_email, [from_email] + subscribers, msg.as_string())
+        # One authenticated connection and one serialised message for every batch.
+        refused: Dict[str, Tuple[int, bytes]] = {}
+        for i in range(0, len(subscribers), batch_size):
+            batch = subscribers[i:i + batch_size]
+            to_addrs = ([from_email] if i == 0 else []) + batch
+            try:
+                refused.update(server.sendmail(from_email, to_addrs, raw))
+            except smtplib.SMTPRecipientsRefused as e:
+                # The whole batch was refused; the remaining batches can still go out.
+                refused.update(e.recipients)
+
+    # Addresses are secrets, so only the count is logged.
+    if refused:
+        print(f"[SMTP] {len(refused)} recipient(s) refused")
+    if all(addr in refused for addr in subscribers):
+        raise RuntimeError("SMTP server refused every subscriber; nothing was delivered.")
 
 
 # ---------------------------
 # Main
 # ---------------------------
 
+def _fetch_and_extract(s: Source, cache_dir: str) -> List[Restaurant]:
+    html = fetch_html_cached(s.url, cache_dir)
+    if "resy.com" in s.url or "blog.resy.com" in s.url:
+        return extract_resy_hit_list(html)
+    if "eater.com" in s.url:
+        return extract_eater_heatmap(html)
+    return []
+
+
 def main() -> None:
     state_path = os.path.join(os.path.dirname(__file__), "..", "data", "state.json")
     state = load_state(state_path)
     last_month_names = state.get("last_month_names", [])
 
+    http_cache_dir = os.path.join(os.path.dirname(__file__), "..", "data", "http_cache")
     all_items: List[Restaurant] = []
 
     for s in SOURCES:
         print(f"Fetching: {s.name} -> {s.url}")
-        html = fetch_html(s.url)
-
-        if "resy.com" in s.url or "blog.resy.com" in s.url:
-            items = extract_resy_hit_list(html)
-        elif "eater.com" in s.url:
-            items = extract_eater_heatmap(html)
-        else:
-            items = []
+    # One worker per source (each is a different host, so no per-host throttling needed).
+    # Parsing runs in the worker too, so one page is parsed while another downloads.
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(SOURCES)))) as ex:
+        futures = [ex.submit(_fetch_and_extract, s, http_cache_dir) for s in SOURCES]
+
+    # Collected in SOURCES order so dedupe() sees the same input every run.
+    failed = 0
+    for s, fut in zip(SOURCES, futures):
+        try:
+            items = fut.result()
+        except Exception as e:
+            print(f"{s.name}: fetch/extract failed, skipping ({e})")
+            failed += 1
+            continue
 
         print(f"{s.name}: extracted {len(items)} items")
         all_items.extend(items)
 
-    merged = dedupe(all_items)
-    for r in merged:
-        r.sources = sorted(list(set(r.sources or [])))
+    if SOURCES and failed == len(SOURCES):
+        raise RuntimeError("All sources failed to fetch; not sending an empty newsletter.")
+
+    merged = dedupe(all_items)  # already leaves each card's sources de-duplicated and sorted
 
     # Default Resy image for Resy-only cards with no Hit List photo
     if DEFAULT_RESY_IMAGE:
@@ -824,11 +1151,15 @@ def main() -> None:
     dist_dir = os.path.join(os.path.dirname(__file__), "..", "dist")
     cache_resy_images_for_pages(merged, dist_dir=dist_dir)
 
-    title, out_path = render_newsletter(output_dir=dist_dir, restaurants=merged)
-    with open(out_path, "r", encoding="utf-8") as f:
-        html_body = f.read()
+    title, out_path, html_body = render_newsletter(output_dir=dist_dir, restaurants=merged)
 
-    save_state(state_path, [r.name for r in merged])
+    names = [r.name for r in merged]
+    if failed:
+        # A skipped source's cards are missing from this issue; keep last month's
+        # names so they still count as carried over next month, not as new.
+        seen = set(names)
+        names += [n for n in last_month_names if n not in seen]
+    save_state(state_path, names)
     send_email(subject=title, html_body=html_body)
 
     print("Generated:", out_path)